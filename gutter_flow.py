@@ -0,0 +1,32 @@
+import math
+import numpy as np
+
+# --- Composite gutter section hydraulics (Manning) ---
+def mannings_flow(area, hydraulic_radius, slope, n):
+    return (1 / n) * area * (hydraulic_radius ** (2 / 3)) * math.sqrt(slope)
+
+def compute_composite_flow(T_arr, W, Sw, Nw, Sx, Nx, Sl):
+    T_arr = np.asarray(T_arr, dtype=float)
+    Tw = np.minimum(T_arr, W)
+    Ts = np.maximum(T_arr - W, 0.0)
+
+    # Terms that don't depend on T
+    sqrt1pSw2 = math.sqrt(1 + Sw * Sw)
+    sqrt1pSx2 = math.sqrt(1 + Sx * Sx)
+    SwW = Sw * W
+
+    Aw = 0.5 * Sw * Tw * Tw
+    Pw = Tw * sqrt1pSw2
+    Rw = np.divide(Aw, Pw, out=np.zeros_like(Aw), where=Pw > 0)
+    Qw = mannings_flow(Aw, Rw, Sl, Nw)
+
+    # Sheet flow only exists where T > W, so skip the inactive lanes entirely
+    Qs = np.zeros_like(T_arr)
+    active = Ts > 0
+    if active.any():
+        Ts = Ts[active]
+        As = Ts * (SwW + Sx * Ts / 2)
+        Ps = Ts + np.sqrt(SwW * SwW + Ts * Ts) + Ts * sqrt1pSx2
+        Qs[active] = mannings_flow(As, As / Ps, Sl, Nx)
+
+    return Qw + Qs
@@ -0,0 +1,47 @@
+import math
+import numpy as np
+from gutter_flow import compute_composite_flow
+
+try:
+    from numba import njit, prange
+except ImportError:  # Numba is optional, the NumPy path is used without it
+    njit = None
+
+# Batch composite-flow sweeps for offline scripts (design charts, parameter studies).
+# Kept out of the Streamlit pages: the parallel kernel's thread pool must not be started
+# from Streamlit's per-session script threads, and the pages only need 50-point curves.
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _composite_flow_kernel(T_arr, W, Sw, Nw, Sx, Nx, Sl, out):
+        # Same equations as compute_composite_flow, fused into one loop with no temporaries
+        sqrt1pSw2 = math.sqrt(1 + Sw * Sw)
+        sqrt1pSx2 = math.sqrt(1 + Sx * Sx)
+        SwW = Sw * W
+        sqrtSl = math.sqrt(Sl)
+        for i in prange(T_arr.size):
+            T = T_arr[i]
+            Tw = min(T, W)
+            Ts = max(T - W, 0.0)
+
+            Aw = 0.5 * Sw * Tw * Tw
+            Pw = Tw * sqrt1pSw2
+            Qw = 0.0
+            if Pw > 0:
+                Qw = (1 / Nw) * Aw * (Aw / Pw) ** (2 / 3) * sqrtSl
+
+            Qs = 0.0
+            if Ts > 0:
+                As = Ts * (SwW + Sx * Ts / 2)
+                Ps = Ts + math.sqrt(SwW * SwW + Ts * Ts) + Ts * sqrt1pSx2
+                Qs = (1 / Nx) * As * (As / Ps) ** (2 / 3) * sqrtSl
+
+            out[i] = Qw + Qs
+        return out
+
+def sweep_composite_flow(T_arr, W, Sw, Nw, Sx, Nx, Sl):
+    # Batch evaluation for large (design chart) sweeps, JIT compiled when Numba is installed
+    if njit is None:
+        return compute_composite_flow(T_arr, W, Sw, Nw, Sx, Nx, Sl)
+    T_arr = np.ascontiguousarray(T_arr, dtype=np.float64)
+    return _composite_flow_kernel(T_arr, W, Sw, Nw, Sx, Nx, Sl, np.empty_like(T_arr))
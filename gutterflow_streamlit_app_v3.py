@@ -1,7 +1,15 @@
+import math
 import streamlit as st
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy.interpolate import interp1d
+import pandas as pd
+import altair as alt
+from scipy.optimize import brentq
+from gutter_flow import compute_composite_flow
+
+try:
+    from scipy.optimize.elementwise import find_root
+except ImportError:  # SciPy < 1.15 has no public vectorized bracketing solver
+    find_root = None
 
 st.title("Composite Gutter Flow Calculator")
 
@@ -53,7 +61,7 @@ with st.expander("ℹ️ About this app"):
     3. **Calculate** flow \( Q_{calc} \) using Manning's Equation.
     4. **Compare** \( Q_{calc} \) to your known flow \( Q \).
     5. If close, **done**. If not, **adjust** and try again.
-    This is why the tool uses a numerical solver (`root_scalar`) — it automates this iterative process to find the correct top width for any given flow.
+    This is why the tool uses a numerical solver (a bracketing root finder) — it automates this iterative process to find the correct top width for any given flow.
     
     ---
     ### 💭 Why It Matters
@@ -77,58 +85,82 @@ Sl = st.sidebar.slider("Longitudinal Slope Sl", 0.001, 0.12, 0.02, 0.001, format
 Q_max = st.sidebar.number_input("Max Flow Q for Plot (m³/s)", value=0.10, step=0.001, format="%.3f")
 Q_input = st.sidebar.number_input("Target Flow Q_input (m³/s)", value=0.025, step=0.001, format="%.3f")
 
-def mannings_flow(area, hydraulic_radius, slope, n):
-    return (1 / n) * area * (hydraulic_radius ** (2 / 3)) * (slope ** 0.5)
-
-def compute_composite_flow(T, W, Sw, Nw, Sx, Nx, Sl):
-    Tw = min(T, W)
-    Ts = max(T - W, 0)
-
-    Aw = 0.5 * Tw * (Sw * Tw)
-    Pw = Tw * np.sqrt(1 + Sw**2)
-    Rw = Aw / Pw if Pw != 0 else 0
-    Qw = mannings_flow(Aw, Rw, Sl, Nw)
-
-    As = Ts * (Sw * W + Sx * Ts / 2)
-    Ps = Ts + np.sqrt((Sw * W)**2 + Ts**2) + Ts * np.sqrt(1 + Sx**2)
-    Rs = As / Ps if Ps != 0 else 0
-    Qs = mannings_flow(As, Rs, Sl, Nx)
-
-    return Qw + Qs
-
 def compute_max_depth(T, W, Sw, Sx):
     if T <= W:
         return Sw * T
     else:
         return Sw * W + Sx * (T - W)
 
-T_values = np.linspace(0.01, 10.0, 500)
-Q_values = [compute_composite_flow(T, W, Sw, Nw, Sx, Nx, Sl) for T in T_values]
-T_filtered = [T for T, Q in zip(T_values, Q_values) if Q <= Q_max]
-Q_filtered = [Q for Q in Q_values if Q <= Q_max]
+@st.cache_data
+def compute_flow_curve(W, Sw, Nw, Sx, Nx, Sl, Q_max):
+    # Only depends on the section geometry, so Q_input changes reuse the cached curve.
+    # This is just for display (Q_input is solved directly), so 50 points is plenty.
+    T_values = np.linspace(0.01, 10.0, 50)
+    Q_values = compute_composite_flow(T_values, W, Sw, Nw, Sx, Nx, Sl)
+    # Resolve the Q <= Q_max filter to indices once and reuse them for both arrays
+    idx = np.flatnonzero(Q_values <= Q_max)
+    return T_values[idx], Q_values[idx]
 
-try:
-    flow_interp = interp1d(Q_filtered, T_filtered, fill_value="extrapolate")
-    T_for_Q_input = float(flow_interp(Q_input))
-    depth_for_Q_input = compute_max_depth(T_for_Q_input, W, Sw, Sx)
-except:
+def solve_top_width(Q_targets, W, Sw, Nw, Sx, Nx, Sl, T_min=0.01, T_max=10.0):
+    # Vectorized Chandrupatla root find over a whole batch of target flows,
+    # NaN where the target falls outside Q(T_min)..Q(T_max)
+    Q_targets = np.atleast_1d(np.asarray(Q_targets, dtype=float))
+    T_solved = np.full(Q_targets.shape, np.nan)
+
+    if find_root is not None:
+        res = find_root(
+            lambda T, Q: compute_composite_flow(T, W, Sw, Nw, Sx, Nx, Sl) - Q,
+            (T_min, T_max),
+            args=(Q_targets,),
+        )
+        T_solved[res.success] = res.x[res.success]
+
+    # Fall back to Brent one element at a time for anything left unsolved
+    Q_lo, Q_hi = compute_composite_flow([T_min, T_max], W, Sw, Nw, Sx, Nx, Sl)
+    for i in np.flatnonzero(np.isnan(T_solved)):
+        if Q_lo <= Q_targets[i] <= Q_hi:
+            T_solved[i] = brentq(
+                lambda T: float(compute_composite_flow(T, W, Sw, Nw, Sx, Nx, Sl)) - Q_targets[i],
+                T_min, T_max,
+            )
+    return T_solved
+
+T_filtered, Q_filtered = compute_flow_curve(W, Sw, Nw, Sx, Nx, Sl, Q_max)
+
+T_for_Q_input = float(solve_top_width(Q_input, W, Sw, Nw, Sx, Nx, Sl)[0])
+if math.isnan(T_for_Q_input):
     T_for_Q_input = None
     depth_for_Q_input = None
+else:
+    depth_for_Q_input = compute_max_depth(T_for_Q_input, W, Sw, Sx)
+
+# Vega-Lite renders the chart in the browser, so reruns only ship the data
+show_solution = T_for_Q_input and Q_input <= Q_max
+# Legend label -> line color; one shared color scale gives the curve and marker lines a legend
+series_colors = {"Flow vs Top Width": "teal"}
+if show_solution:
+    Q_label = f"Q_input = {Q_input:.3f} m³/s"
+    T_label = f"T = {T_for_Q_input:.3f} m"
+    series_colors[Q_label] = "red"
+    series_colors[T_label] = "blue"
+color = alt.Color("label:N", title=None,
+                  scale=alt.Scale(domain=list(series_colors), range=list(series_colors.values())))
+
+curve_df = pd.DataFrame({"T": T_filtered, "Q": Q_filtered, "label": "Flow vs Top Width"})
+chart = alt.Chart(curve_df).mark_line().encode(
+    x=alt.X("T:Q", title="Top Width T (m)"),
+    y=alt.Y("Q:Q", title="Flow Q (m³/s)"),
+    color=color,
+    tooltip=[alt.Tooltip("T:Q", format=".3f"), alt.Tooltip("Q:Q", format=".4f")],
+)
+if show_solution:
+    point_df = pd.DataFrame({"T": [T_for_Q_input], "Q": [Q_input]})
+    chart += alt.Chart(point_df.assign(label=Q_label)).mark_rule(strokeDash=[4, 4]).encode(y="Q:Q", color=color)
+    chart += alt.Chart(point_df.assign(label=T_label)).mark_rule(strokeDash=[4, 4]).encode(x="T:Q", color=color)
+    chart += alt.Chart(point_df).mark_point(color="red", filled=True, size=60).encode(x="T:Q", y="Q:Q")
+st.altair_chart(chart.properties(title="Flow vs Top Width in Composite Gutter Section"))
 
-fig, ax = plt.subplots()
-ax.plot(T_filtered, Q_filtered, label="Flow vs Top Width", color="teal")
-if T_for_Q_input and Q_input <= Q_max:
-    ax.axhline(y=Q_input, color='red', linestyle='--', label=f"Q_input = {Q_input:.3f} m³/s")
-    ax.axvline(x=T_for_Q_input, color='blue', linestyle='--', label=f"T = {T_for_Q_input:.3f} m")
-    ax.plot(T_for_Q_input, Q_input, 'ro')
-ax.set_xlabel("Top Width T (m)")
-ax.set_ylabel("Flow Q (m³/s)")
-ax.set_title("Flow vs Top Width in Composite Gutter Section")
-ax.grid(True)
-ax.legend()
-st.pyplot(fig)
-
-if T_for_Q_input and Q_input <= Q_max:
+if show_solution:
     st.markdown(f"**Computed Top Width for Q_input = {Q_input:.3f} m³/s is T = {T_for_Q_input:.3f} m**")
     st.markdown(f"**Maximum Depth at T = {T_for_Q_input:.3f} m is {depth_for_Q_input:.3f} m**")
     if depth_for_Q_input > 0.150:
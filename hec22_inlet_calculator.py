@@ -1,9 +1,167 @@
+import math
 import streamlit as st
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from io import BytesIO
 from scipy import optimize
 
+# Exponents of the HEC-22 gutter flow and velocity equations. Q carries Sx**1.67 and
+# T**2.67, exactly one power of Sx and two of T more than V.
+Q_EXP_T = 2.67
+V_EXP = 0.67
+
+GRATE_TYPES = (
+    "P-1-7/8", "P-1-7/8-4", "P-1-1/8", "Curved Vane",
+    "45° Tilt-Bar", "30° Tilt-Bar", "Reticuline"
+)
+
+# Splash-over velocities (ft/s) based on Figure 7.8, one row per GRATE_TYPES entry,
+# columns are the 2 ft and 4 ft grate lengths
+SPLASH_OVER_VELOCITIES = np.array([
+    [8.2, 12.0],
+    [8.0, 11.9],
+    [6.5, 9.8],
+    [7.4, 10.9],
+    [6.4, 9.4],
+    [5.8, 8.6],
+    [6.3, 9.2],
+])
+SPLASH_OVER_VELOCITIES_SI = SPLASH_OVER_VELOCITIES * 0.3048  # Convert from ft/s to m/s
+
+# Opening ratios based on Table 7.5, in GRATE_TYPES order
+OPENING_RATIOS = np.array([0.9, 0.8, 0.6, 0.35, 0.34, 0.34, 0.8])
+
+# Efficiency values from Table 7.2
+DEBRIS_HANDLING = {
+    "Curved Vane": "Highest",
+    "30° Tilt-Bar": "Very Good",
+    "P-1-7/8": "Moderate",
+    "P-1-7/8-4": "Fair",
+    "45° Tilt-Bar": "Fair",
+    "Reticuline": "Poor",
+    "P-1-1/8": "Poor"
+}
+
+# Bicycle safety from Table 7.3
+BICYCLE_SAFETY = {
+    "P-1-7/8-4": "Excellent",
+    "Reticuline": "Very Good",
+    "P-1-1/8": "Good",
+    "45° Tilt-Bar": "Good",
+    "Curved Vane": "Fair",
+    "30° Tilt-Bar": "Fair",
+    "P-1-7/8": "Poor - Not bicycle safe"
+}
+
+def inlet_efficiency(Q, V, Vo, grate_width, grate_length, T, Sx, Ku_splash, Ku_side, clogging_factor):
+    # Frontal flow ratio (Eo)
+    Eo = 1.0 - math.pow(1.0 - min(grate_width/T, 1.0), Q_EXP_T)
+    
+    # Frontal flow interception efficiency (Rf), limited between 0 and 1
+    if V < Vo:
+        Rf = 1.0
+    else:
+        Rf = max(0.0, min(1.0, 1.0 - Ku_splash * (V - Vo)))
+    
+    # Side flow interception efficiency (Rs)
+    Rs = 1.0 / (1.0 + (Ku_side * math.pow(V, 1.8)) / (Sx * math.pow(grate_length, 2.3)))
+    
+    # Total interception efficiency
+    E = Rf * Eo + Rs * (1.0 - Eo)
+    
+    # Interception capacity with any clogging reduction applied, and the bypass flow
+    Qi = Q * E * (1.0 - clogging_factor)
+    Qb = Q - Qi
+    return Eo, Rf, Rs, E, Qi, Qb
+
+def figure_png(fig):
+    # Rendered the way st.pyplot would, so the cached schematics are plain bytes that
+    # sessions can share
+    buf = BytesIO()
+    fig.savefig(buf, format="png", bbox_inches="tight", dpi=200)
+    return buf.getvalue()
+
+# The schematics are cached as PNG bytes rather than Figure objects. A bare Figure is not
+# registered with pyplot, so it is freed once rendered.
+@st.cache_data(max_entries=64)
+def grade_cross_section_png(T, Sx, grate_width, length_unit):
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    
+    # Plot the gutter cross-section (the water surface is linear, so two points suffice)
+    x_gutter = [0, T]
+    y_gutter = [0, Sx * T]
+    
+    # Plot the water surface and gutter
+    ax.plot(x_gutter, y_gutter, 'b-', linewidth=2)
+    ax.fill_between(x_gutter, 0, y_gutter, color='blue', alpha=0.3)
+    
+    # Plot the grate
+    grate_x = [0, grate_width, grate_width, 0, 0]
+    grate_y = [0, Sx*grate_width, Sx*grate_width, 0, 0]
+    ax.plot(grate_x, grate_y, 'k-', linewidth=2)
+    
+    # Fill the grate area
+    ax.fill_between([0, grate_width], 0, [0, Sx*grate_width], color='gray', alpha=0.5)
+    
+    # Add flow arrows
+    arrow_x = T * 0.7
+    arrow_y = Sx * arrow_x * 0.5
+    ax.arrow(arrow_x, arrow_y, -0.3, 0, head_width=0.02, head_length=0.1, fc='black', ec='black')
+    
+    # Add labels
+    ax.set_xlabel(f'Width ({length_unit})')
+    ax.set_ylabel(f'Depth ({length_unit})')
+    ax.set_title('Gutter Cross-Section with Grate Inlet')
+    ax.grid(True)
+    
+    # Set equal aspect ratio
+    ax.set_aspect('equal')
+    
+    return figure_png(fig)
+
+@st.cache_data(max_entries=64)
+def sag_cross_section_png(T, Sx, grate_width, length_unit):
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    
+    # Plot the gutter cross-section (the water surface is linear, so two points suffice)
+    x_gutter = [0, T]
+    y_gutter = [0, Sx * T]
+    
+    # Plot the water surface and gutter
+    ax.plot(x_gutter, y_gutter, 'b-', linewidth=2)
+    ax.fill_between(x_gutter, 0, y_gutter, color='blue', alpha=0.3)
+    
+    # Plot the grate
+    grate_x = [0, grate_width, grate_width, 0, 0]
+    grate_y = [0, Sx*grate_width, Sx*grate_width, 0, 0]
+    ax.plot(grate_x, grate_y, 'k-', linewidth=2)
+    
+    # Fill the grate area
+    ax.fill_between([0, grate_width], 0, [0, Sx*grate_width], color='gray', alpha=0.5)
+    
+    # Add flow arrows for sag (converging from both sides)
+    arrow_x1 = T * 0.7
+    arrow_y1 = Sx * arrow_x1 * 0.5
+    ax.arrow(arrow_x1, arrow_y1, -0.3, 0, head_width=0.02, head_length=0.1, fc='blue', ec='blue')
+    
+    arrow_x2 = T * 0.3
+    arrow_y2 = Sx * arrow_x2 * 0.5
+    ax.arrow(arrow_x2, arrow_y2, 0.3, 0, head_width=0.02, head_length=0.1, fc='blue', ec='blue')
+    
+    # Add labels
+    ax.set_xlabel(f'Width ({length_unit})')
+    ax.set_ylabel(f'Depth ({length_unit})')
+    ax.set_title('Sag Inlet Cross-Section')
+    ax.grid(True)
+    
+    # Set equal aspect ratio
+    ax.set_aspect('equal')
+    
+    return figure_png(fig)
+
 # Set page config
 st.set_page_config(page_title="HEC-22 Inlet Capacity Calculator", layout="wide")
 
@@ -38,6 +196,7 @@ with tab1:
             Ku_side = 0.15
             Ku_gutter = 0.56
             Ku_velocity = 1.11
+            Ku_flow_ratio = Ku_gutter / Ku_velocity
         else:
             length_unit = "m"
             flow_unit = "m³/s"
@@ -45,17 +204,24 @@ with tab1:
             Ku_side = 0.0828
             Ku_gutter = 0.376
             Ku_velocity = 0.752
+            Ku_flow_ratio = Ku_gutter / Ku_velocity
         
         n = st.number_input(f"Manning's n", 0.010, 0.050, 0.016, 0.001)
         Sx = st.number_input(f"Cross Slope (Sx) ({length_unit}/{length_unit})", 0.01, 0.10, 0.025, 0.001, format="%.3f")
         SL = st.number_input(f"Longitudinal Slope (SL) ({length_unit}/{length_unit})", 0.001, 0.10, 0.03, 0.001, format="%.3f")
         T = st.number_input(f"Spread (T) ({length_unit})", 1.0, 20.0, 8.0, 0.1)
         
-        # Calculate gutter flow using Manning's equation
-        Q = (Ku_gutter/n) * Sx**(1.67) * SL**(0.5) * T**(2.67)
+        # Fold the non-spread inputs into constants so V = C_V T^0.67 and Q = C_Q T^2.67
+        # only vary through T (Q/V = (Ku_gutter/Ku_velocity) Sx T^2)
+        C_V = (Ku_velocity/n) * math.sqrt(SL) * math.pow(Sx, V_EXP)
+        C_Q = C_V * Ku_flow_ratio * Sx
+        T_pow = math.pow(T, V_EXP)
         
         # Calculate velocity
-        V = (Ku_velocity/n) * SL**(0.5) * Sx**(0.67) * T**(0.67)
+        V = C_V * T_pow
+        
+        # Calculate gutter flow using Manning's equation, Q = (Ku_gutter/n) Sx^1.67 SL^0.5 T^2.67
+        Q = C_Q * T_pow * T * T
         
         st.metric("Total Gutter Flow (Q)", f"{Q:.3f} {flow_unit}")
         st.metric("Flow Velocity (V)", f"{V:.2f} {length_unit}/s")
@@ -63,21 +229,7 @@ with tab1:
     with col2:
         st.subheader("Grate Parameters")
         
-        grate_type = st.selectbox("Grate Type", [
-            "P-1-7/8", "P-1-7/8-4", "P-1-1/8", "Curved Vane", 
-            "45° Tilt-Bar", "30° Tilt-Bar", "Reticuline"
-        ])
-        
-        # Define splash-over velocities based on Figure 7.8
-        splash_over_velocities = {
-            "P-1-7/8": {"2ft": 8.2, "4ft": 12.0},
-            "P-1-7/8-4": {"2ft": 8.0, "4ft": 11.9},
-            "P-1-1/8": {"2ft": 6.5, "4ft": 9.8},
-            "Curved Vane": {"2ft": 7.4, "4ft": 10.9},
-            "45° Tilt-Bar": {"2ft": 6.4, "4ft": 9.4},
-            "30° Tilt-Bar": {"2ft": 5.8, "4ft": 8.6},
-            "Reticuline": {"2ft": 6.3, "4ft": 9.2}
-        }
+        grate_type = st.selectbox("Grate Type", GRATE_TYPES)
         
         # Get the grate dimensions
         grate_width = st.number_input(f"Grate Width (W) ({length_unit})", 1.0, 5.0, 2.0, 0.1)
@@ -86,79 +238,32 @@ with tab1:
         # Show grate-specific information
         st.markdown("### Grate Properties")
         
-        # Convert length to categorical value for splash-over velocity lookup
-        length_category = "2ft" if grate_length <= 3.0 else "4ft"
+        # Convert length to the 2 ft / 4 ft column for splash-over velocity lookup
+        length_category = 0 if grate_length <= 3.0 else 1
         
-        # Get splash-over velocity for the selected grate
-        Vo = splash_over_velocities[grate_type][length_category]
-        
-        # Adjust if using SI units
-        if unit_system == "SI (metric)":
-            Vo = Vo * 0.3048  # Convert from ft/s to m/s
+        # Get splash-over velocity for the selected grate, in the selected units
+        splash_table = SPLASH_OVER_VELOCITIES_SI if unit_system == "SI (metric)" else SPLASH_OVER_VELOCITIES
+        Vo = float(splash_table[GRATE_TYPES.index(grate_type), length_category])
             
         # Show splash-over velocity
         st.metric("Splash-over Velocity (Vo)", f"{Vo:.2f} {length_unit}/s")
         
         # Show efficiency values from Table 7.2 (if needed)
         st.markdown("#### Debris Handling Efficiency")
-        debris_handling = {
-            "Curved Vane": "Highest",
-            "30° Tilt-Bar": "Very Good",
-            "45° Tilt-Bar": "Good",
-            "P-1-7/8": "Moderate",
-            "P-1-7/8-4": "Fair",
-            "45° Tilt-Bar": "Fair",
-            "Reticuline": "Poor",
-            "P-1-1/8": "Poor"
-        }
-        st.info(f"Debris Handling: {debris_handling.get(grate_type, 'Unknown')}")
+        st.info(f"Debris Handling: {DEBRIS_HANDLING.get(grate_type, 'Unknown')}")
         
         # Show bicycle safety from Table 7.3 (if needed)
-        bicycle_safety = {
-            "P-1-7/8-4": "Excellent",
-            "Reticuline": "Very Good",
-            "P-1-1/8": "Good",
-            "45° Tilt-Bar": "Good",
-            "Curved Vane": "Fair",
-            "30° Tilt-Bar": "Fair",
-            "P-1-7/8": "Poor - Not bicycle safe"
-        }
-        st.info(f"Bicycle Safety: {bicycle_safety.get(grate_type, 'Unknown')}")
+        st.info(f"Bicycle Safety: {BICYCLE_SAFETY.get(grate_type, 'Unknown')}")
         
         clogging_factor = st.slider("Clogging Factor (%)", 0, 50, 0, 5) / 100
     
     # Calculation section
     st.header("Calculations")
     
-    # Calculate frontal flow ratio (Eo)
-    Eo = 1 - (1 - min(grate_width/T, 1.0))**2.67
-    
-    # Calculate frontal flow interception efficiency (Rf)
-    if V < Vo:
-        Rf = 1.0
-    else:
-        Rf = 1 - Ku_splash * (V - Vo)
-        Rf = max(0.0, min(1.0, Rf))  # Limit Rf between 0 and 1
-    
-    # Calculate side flow interception efficiency (Rs)
-    Rs = 1 / (1 + (Ku_side * V**1.8) / (Sx * grate_length**2.3))
-    
-    # Calculate total interception efficiency
-    E = Rf * Eo + Rs * (1 - Eo)
-    
-    # Calculate interception capacity
-    Qi = Q * E
-    
-    # Calculate bypass flow
-    Qb = Q - Qi
-    
-    # Apply clogging reduction if specified
-    if clogging_factor > 0:
-        Qi_clogged = Qi * (1 - clogging_factor)
-        Qb_clogged = Q - Qi_clogged
-    else:
-        Qi_clogged = Qi
-        Qb_clogged = Qb
+    # Calculate the frontal, side and total efficiencies and the intercepted/bypass flows
+    Eo, Rf, Rs, E, Qi_clogged, Qb_clogged = inlet_efficiency(
+        Q, V, Vo, grate_width, grate_length, T, Sx, Ku_splash, Ku_side, clogging_factor
+    )
     
     # Create columns for results
     col1, col2 = st.columns(2)
@@ -179,41 +284,8 @@ with tab1:
     # Create a visual representation
     st.header("Visual Representation")
     
-    # Create a simple visualization
-    fig, ax = plt.subplots(figsize=(10, 6))
-    
-    # Plot the gutter cross-section
-    x_gutter = np.linspace(0, T, 100)
-    y_gutter = Sx * x_gutter
-    
-    # Plot the water surface and gutter
-    ax.plot(x_gutter, y_gutter, 'b-', linewidth=2)
-    ax.fill_between(x_gutter, 0, y_gutter, color='blue', alpha=0.3)
-    
-    # Plot the grate
-    grate_x = [0, grate_width, grate_width, 0, 0]
-    grate_y = [0, Sx*grate_width, Sx*grate_width, 0, 0]
-    ax.plot(grate_x, grate_y, 'k-', linewidth=2)
-    
-    # Fill the grate area
-    ax.fill_between([0, grate_width], 0, [0, Sx*grate_width], color='gray', alpha=0.5)
-    
-    # Add flow arrows
-    arrow_x = T * 0.7
-    arrow_y = Sx * arrow_x * 0.5
-    ax.arrow(arrow_x, arrow_y, -0.3, 0, head_width=0.02, head_length=0.1, fc='black', ec='black')
-    
-    # Add labels
-    ax.set_xlabel(f'Width ({length_unit})')
-    ax.set_ylabel(f'Depth ({length_unit})')
-    ax.set_title('Gutter Cross-Section with Grate Inlet')
-    ax.grid(True)
-    
-    # Set equal aspect ratio
-    ax.set_aspect('equal')
-    
-    # Show plot
-    st.pyplot(fig)
+    # Create a simple visualization (cached, it only depends on these inputs)
+    st.image(grade_cross_section_png(T, Sx, grate_width, length_unit), width="stretch")
     
     with st.expander("💡 Why Efficiency Is Important"):
         st.markdown("""
@@ -324,27 +396,13 @@ with tab2:
     with col2:
         st.subheader("Grate Parameters")
         
-        grate_type_sag = st.selectbox("Grate Type", [
-            "P-1-7/8", "P-1-7/8-4", "P-1-1/8", "Curved Vane", 
-            "45° Tilt-Bar", "30° Tilt-Bar", "Reticuline"
-        ], key="grate_type_sag")
+        grate_type_sag = st.selectbox("Grate Type", GRATE_TYPES, key="grate_type_sag")
         
         # Get the grate dimensions
         grate_width_sag = st.number_input(f"Grate Width (W) ({length_unit_sag})", 1.0, 5.0, 2.0, 0.1, key="grate_width_sag")
         grate_length_sag = st.number_input(f"Grate Length (L) ({length_unit_sag})", 1.0, 10.0, 3.0, 0.1, key="grate_length_sag")
         
-        # Define opening ratios based on Table 7.5
-        opening_ratios = {
-            "P-1-7/8": 0.9, 
-            "P-1-7/8-4": 0.8, 
-            "P-1-1/8": 0.6, 
-            "Curved Vane": 0.35, 
-            "45° Tilt-Bar": 0.34, 
-            "30° Tilt-Bar": 0.34, 
-            "Reticuline": 0.8
-        }
-        
-        opening_ratio = opening_ratios[grate_type_sag]
+        opening_ratio = float(OPENING_RATIOS[GRATE_TYPES.index(grate_type_sag)])
         
         # Calculate clear opening area
         clear_area = grate_width_sag * grate_length_sag * opening_ratio
@@ -419,45 +477,8 @@ with tab2:
     # Create a visual representation
     st.header("Visual Representation")
     
-    # Create a simple visualization of the sag inlet
-    fig, ax = plt.subplots(figsize=(10, 6))
-    
-    # Plot the gutter cross-section
-    x_gutter = np.linspace(0, T_sag, 100)
-    y_gutter = Sx_sag * x_gutter
-    
-    # Plot the water surface and gutter
-    ax.plot(x_gutter, y_gutter, 'b-', linewidth=2)
-    ax.fill_between(x_gutter, 0, y_gutter, color='blue', alpha=0.3)
-    
-    # Plot the grate
-    grate_x = [0, grate_width_sag, grate_width_sag, 0, 0]
-    grate_y = [0, Sx_sag*grate_width_sag, Sx_sag*grate_width_sag, 0, 0]
-    ax.plot(grate_x, grate_y, 'k-', linewidth=2)
-    
-    # Fill the grate area
-    ax.fill_between([0, grate_width_sag], 0, [0, Sx_sag*grate_width_sag], color='gray', alpha=0.5)
-    
-    # Add flow arrows for sag (converging from both sides)
-    arrow_x1 = T_sag * 0.7
-    arrow_y1 = Sx_sag * arrow_x1 * 0.5
-    ax.arrow(arrow_x1, arrow_y1, -0.3, 0, head_width=0.02, head_length=0.1, fc='blue', ec='blue')
-    
-    arrow_x2 = T_sag * 0.3
-    arrow_y2 = Sx_sag * arrow_x2 * 0.5
-    ax.arrow(arrow_x2, arrow_y2, 0.3, 0, head_width=0.02, head_length=0.1, fc='blue', ec='blue')
-    
-    # Add labels
-    ax.set_xlabel(f'Width ({length_unit_sag})')
-    ax.set_ylabel(f'Depth ({length_unit_sag})')
-    ax.set_title('Sag Inlet Cross-Section')
-    ax.grid(True)
-    
-    # Set equal aspect ratio
-    ax.set_aspect('equal')
-    
-    # Show plot
-    st.pyplot(fig)
+    # Create a simple visualization of the sag inlet (cached, it only depends on these inputs)
+    st.image(sag_cross_section_png(T_sag, Sx_sag, grate_width_sag, length_unit_sag), width="stretch")
     
     # Add expandable information sections
     with st.expander("💡 Why Sag Inlets Are Critical"):
@@ -1,57 +1,12 @@
 import streamlit as st
 import numpy as np
 import matplotlib.pyplot as plt
-import random
+from tc_methods import monte_carlo_analysis, summary_stats
 
-# --- Time of Concentration Methods ---
-def kirpich_tc(length, slope):
-    return 0.01947 * (length ** 0.77) * (slope ** -0.385)
-
-def nrcs_sheetflow_tc(length, slope, n, p2):
-    return ((0.007 * n * length) ** 0.8) / (p2 ** 0.5 * (slope ** 0.4))
-
-def manning_tc(length, slope, n):
-    return (1.44 * (length ** 0.6) * (n ** 0.6)) / (slope ** 0.3)
-
-def bransby_williams_tc(area, slope):
-    return 58.5 * ((area * 1e6) ** 0.1) * (slope ** -0.2)
-
-def airport_tc(area):
-    return 1.8 * ((area * 1e6) ** 0.5) / 1000 - 0.5
-
-def kerby_hathaway_tc(length, slope, n):
-    return 0.946 * (length ** 0.77) * ((slope / n) ** -0.385)
-
-def izzard_tc(length, slope, n, k=0.00025):
-    return k * (length ** 0.9) * (slope ** -0.6) * (n ** 0.4)
-
-# --- Monte Carlo ---
-def monte_carlo_analysis(length_range, slope_range, roughness_range, area_range, iterations, p2, izzard_k):
-    results = {
-        'Kirpich': [],
-        'NRCS (Sheet Flow)': [],
-        'Manning-KWA': [],
-        'Bransby-Williams': [],
-        'Airport': [],
-        'Kerby-Hathaway': [],
-        'Izzard': []
-    }
-
-    for _ in range(iterations):
-        L = random.uniform(*length_range)
-        S = random.uniform(*slope_range)
-        n = random.uniform(*roughness_range)
-        A = random.uniform(*area_range)
-
-        results['Kirpich'].append(kirpich_tc(L, S))
-        results['NRCS (Sheet Flow)'].append(nrcs_sheetflow_tc(L, S, n, p2))
-        results['Manning-KWA'].append(manning_tc(L, S, n))
-        results['Bransby-Williams'].append(bransby_williams_tc(A, S))
-        results['Airport'].append(airport_tc(A))
-        results['Kerby-Hathaway'].append(kerby_hathaway_tc(L, S, n))
-        results['Izzard'].append(izzard_tc(L, S, n, izzard_k))
-
-    return results
+# Binned once and cached, so a rerun with the same results skips re-binning
+@st.cache_data(max_entries=64)
+def histogram_counts(arr, bins=30):
+    return np.histogram(arr, bins=bins)
 
 # --- Streamlit UI ---
 st.set_page_config(page_title="Time of Concentration App", layout="wide")
@@ -114,16 +69,25 @@ if st.button("🚀 Run Monte Carlo Simulation"):
     st.markdown("---")
     st.header("📊 Simulation Results")
 
-    for method, values in filtered_results.items():
-        arr = np.array(values)
-        st.subheader(f"{'⭐ ' if method in recommended else ''}{method}")
-        st.write(f"**Mean:** {np.mean(arr):.2f} min")
-        st.write(f"**Std Dev:** {np.std(arr):.2f} min")
-        st.write(f"**Min:** {np.min(arr):.2f} | Max: {np.max(arr):.2f}")
+    stats = {method: summary_stats(arr) for method, arr in filtered_results.items()}
 
-        fig, ax = plt.subplots()
-        ax.hist(arr, bins=30, color='orange' if method in recommended else 'skyblue', edgecolor='black')
+    # One figure, cleared and redrawn for each method (st.pyplot renders it immediately)
+    fig, ax = plt.subplots()
+
+    for method, arr in filtered_results.items():
+        mean, std, min_tc, max_tc = stats[method]
+        st.subheader(f"{'⭐ ' if method in recommended else ''}{method}")
+        st.write(f"**Mean:** {mean:.2f} min")
+        st.write(f"**Std Dev:** {std:.2f} min")
+        st.write(f"**Min:** {min_tc:.2f} | Max: {max_tc:.2f}")
+
+        ax.clear()
+        counts, edges = histogram_counts(arr)
+        ax.bar(edges[:-1], counts, width=np.diff(edges), align='edge',
+               color='orange' if method in recommended else 'skyblue', edgecolor='black')
         ax.set_title(f"{method} Distribution")
         ax.set_xlabel("Time of Concentration (min)")
         ax.set_ylabel("Frequency")
         st.pyplot(fig)
+
+    plt.close(fig)
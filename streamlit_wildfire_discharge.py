@@ -2,6 +2,7 @@ import streamlit as st
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
+from matplotlib.colors import ListedColormap
 from io import BytesIO
 
 st.title("Monte Carlo Simulation of Peak Discharge with Wildfire Effects")
@@ -25,6 +26,34 @@ with st.expander("ℹ️ About this app"):
     """)
 
 
+def normal_samples(rng, mean, std, shape):
+    # Float32 normal draws (ample for discharges reported to 2 decimals, and half the memory traffic).
+    # Generator.normal has no dtype argument, so scale standard normals in place instead.
+    samples = rng.standard_normal(shape, dtype=np.float32)
+    samples *= std
+    samples += mean
+    return samples
+
+
+def fire_effect_active(fires_to_date, duration):
+    # A year is fire-affected if a fire occurred in it or in any of the previous duration - 1 years,
+    # i.e. the running count of fires over a duration-year window is positive.
+    # fires_to_date is the cumulative fire count along each simulation's years.
+    fires_before_window = np.zeros_like(fires_to_date)
+    fires_before_window[:, duration:] = fires_to_date[:, :-duration]
+    return fires_to_date - fires_before_window > 0
+
+
+def simulate_discharge(C_base, C_post, fires_to_date, duration, k):
+    # Peak discharge per simulation-year, using the post-wildfire C while a fire effect is active.
+    # The C selection and the scaling both happen in the one output buffer.
+    Q = np.empty_like(C_base)
+    active = fire_effect_active(fires_to_date, duration)
+    np.copyto(Q, C_base)
+    np.copyto(Q, C_post, where=active)
+    return np.multiply(Q, k, out=Q)
+
+
 # Sidebar inputs
 rainfall_intensity = st.sidebar.slider("Rainfall Intensity (mm/hr)", 10, 250, 50, 1, help="Design rainfall intensity in mm/hr")
 drainage_area = st.sidebar.slider("Drainage Area (hectares)", 0.5, 1000.0, 100.0, 0.5, help="Catchment area contributing to runoff")
@@ -41,52 +70,55 @@ design_lifespan_years = st.sidebar.slider("Design Lifespan (years)", 10, 200, 70
 fire_effect_duration = st.sidebar.slider("Fire Effect Duration (years)", 1, 50, 15, 1, help="Number of years wildfire effects persist on runoff")
 
 num_simulations = 10000
+rng = np.random.default_rng()
 
 # Generate random samples
-C_baseline_samples = np.random.normal(mean_C_baseline, std_C_baseline, (num_simulations, design_lifespan_years))
-C_post_wildfire_samples = np.random.normal(mean_C_post_wildfire, std_C_post_wildfire, (num_simulations, design_lifespan_years))
+C_baseline_samples = normal_samples(rng, mean_C_baseline, std_C_baseline, (num_simulations, design_lifespan_years))
+C_post_wildfire_samples = normal_samples(rng, mean_C_post_wildfire, std_C_post_wildfire, (num_simulations, design_lifespan_years))
 
 # Convert units
 drainage_area_m2 = drainage_area * 10000
 rainfall_intensity_m_s = rainfall_intensity / 3600000
+# Scalar part of the rational method Q = C i A, multiplied out once so each array only sees one multiply
+discharge_factor = np.float32(rainfall_intensity_m_s * drainage_area_m2)
 
 # Simulate wildfire effects
-wildfire_occurrences = np.random.binomial(1, prob_wildfire_annual, (num_simulations, design_lifespan_years))
-Q_samples = np.zeros((num_simulations, design_lifespan_years))
-
-for sim in range(num_simulations):
-    C_values = np.copy(C_baseline_samples[sim])
-    for year in range(design_lifespan_years):
-        if wildfire_occurrences[sim, year] == 1:
-            end_effect_year = min(year + fire_effect_duration, design_lifespan_years)
-            C_values[year:end_effect_year] = C_post_wildfire_samples[sim, year:end_effect_year]
-    Q_samples[sim, :] = C_values * rainfall_intensity_m_s * drainage_area_m2
-
-Q_baseline_discharge = C_baseline_samples * rainfall_intensity_m_s * drainage_area_m2
+# One Bernoulli draw per simulation-year, kept as bool (1 byte) rather than binomial's int64.
+# Fire counts never exceed the design lifespan (<= 200 years), so int16 holds the running total.
+wildfire_occurrences = rng.random((num_simulations, design_lifespan_years), dtype=np.float32) < prob_wildfire_annual
+fires_to_date = np.cumsum(wildfire_occurrences, axis=1, dtype=np.int16)
+Q_samples = simulate_discharge(C_baseline_samples, C_post_wildfire_samples, fires_to_date,
+                               fire_effect_duration, discharge_factor)
+
+Q_baseline_discharge = C_baseline_samples * discharge_factor
 Q_avg_lifespan = np.mean(Q_samples, axis=1)
 Q_avg_baseline = np.mean(Q_baseline_discharge, axis=1)
 
 confidence_level = 0.85
-lower_percentile = (1 - confidence_level) / 2 * 100
-upper_percentile = (1 + confidence_level) / 2 * 100
+ci_quantiles = [(1 - confidence_level) / 2, (1 + confidence_level) / 2]
 
-Q_avg_lower = np.percentile(Q_avg_lifespan, lower_percentile)
-Q_avg_upper = np.percentile(Q_avg_lifespan, upper_percentile)
-Q_baseline_lower = np.percentile(Q_avg_baseline, lower_percentile)
-Q_baseline_upper = np.percentile(Q_avg_baseline, upper_percentile)
+# Both bounds from one partition of each array
+Q_avg_lower, Q_avg_upper = np.quantile(Q_avg_lifespan, ci_quantiles)
+Q_baseline_lower, Q_baseline_upper = np.quantile(Q_avg_baseline, ci_quantiles)
 
 avg_num_wildfires = np.mean(np.sum(wildfire_occurrences, axis=1))
 
+# Summary statistics, shared by the plot, the summary text and the sensitivity scan
+mean_wf = np.mean(Q_avg_lifespan)
+mean_bl = np.mean(Q_avg_baseline)
+std_wf = np.std(Q_avg_lifespan)
+std_bl = np.std(Q_avg_baseline)
+
 # Plot histogram
 fig_hist, ax = plt.subplots(figsize=(12, 6))
 ax.hist(Q_avg_lifespan, bins=50, alpha=0.7, label='With Wildfires', color='brown')
 ax.hist(Q_avg_baseline, bins=100, alpha=0.5, label='No Wildfires', color='green')
 
-ax.axvline(np.mean(Q_avg_lifespan), color='red', linestyle='--', label='Mean (Wildfires)')
+ax.axvline(mean_wf, color='red', linestyle='--', label='Mean (Wildfires)')
 ax.axvline(Q_avg_lower, color='green', linestyle=':', label='85% CI Lower (Wildfires)')
 ax.axvline(Q_avg_upper, color='green', linestyle=':', label='85% CI Upper (Wildfires)')
 
-ax.axvline(np.mean(Q_avg_baseline), color='blue', linestyle='--', label='Mean (No Wildfires)')
+ax.axvline(mean_bl, color='blue', linestyle='--', label='Mean (No Wildfires)')
 ax.axvline(Q_baseline_lower, color='purple', linestyle=':', label='85% CI Lower (No Wildfires)')
 ax.axvline(Q_baseline_upper, color='purple', linestyle=':', label='85% CI Upper (No Wildfires)')
 
@@ -97,44 +129,41 @@ ax.legend()
 ax.grid(True)
 st.pyplot(fig_hist)
 
-st.write(f"**Baseline (No Wildfires)**: Mean = {np.mean(Q_avg_baseline):.2f}, Std Dev = {np.std(Q_avg_baseline):.2f}, 85% CI = ({Q_baseline_lower:.2f}, {Q_baseline_upper:.2f})")
-st.write(f"**With Wildfires**: Mean = {np.mean(Q_avg_lifespan):.2f}, Std Dev = {np.std(Q_avg_lifespan):.2f}, 85% CI = ({Q_avg_lower:.2f}, {Q_avg_upper:.2f})")
+st.write(f"**Baseline (No Wildfires)**: Mean = {mean_bl:.2f}, Std Dev = {std_bl:.2f}, 85% CI = ({Q_baseline_lower:.2f}, {Q_baseline_upper:.2f})")
+st.write(f"**With Wildfires**: Mean = {mean_wf:.2f}, Std Dev = {std_wf:.2f}, 85% CI = ({Q_avg_lower:.2f}, {Q_avg_upper:.2f})")
 st.write(f"**Avg Wildfires Over Lifespan**: {avg_num_wildfires:.2f}")
 
 # Wildfire timelines
 st.subheader("Example Wildfire Occurrence Timelines")
 num_examples = st.slider("Number of Simulations to Display", 1, 10, 3)
-fig_occ, ax_occ = plt.subplots(num_examples, 1, figsize=(10, 2.5 * num_examples), sharex=True)
-if num_examples == 1:
-    ax_occ = [ax_occ]
-
-for i in range(num_examples):
-    sim_index = np.random.randint(num_simulations)
-    years = np.arange(design_lifespan_years)
-    ax_occ[i].bar(years, wildfire_occurrences[sim_index], color='firebrick')
-    ax_occ[i].set_title(f"Simulation #{sim_index + 1}")
-    ax_occ[i].set_ylabel("Wildfire")
-    ax_occ[i].set_yticks([0, 1])
-    ax_occ[i].set_ylim(-0.1, 1.1)
-ax_occ[-1].set_xlabel("Year")
+sample_rows = rng.choice(num_simulations, size=num_examples, replace=False)
+
+# One heatmap row per sampled simulation, drawn in a single imshow call
+fig_occ, ax_occ = plt.subplots(figsize=(10, 1 + 0.5 * num_examples))
+ax_occ.imshow(wildfire_occurrences[sample_rows], aspect='auto', interpolation='nearest',
+              cmap=ListedColormap(['white', 'firebrick']), vmin=0, vmax=1)
+ax_occ.set_yticks(range(num_examples))
+ax_occ.set_yticklabels([f"Simulation #{sim_index + 1}" for sim_index in sample_rows])
+ax_occ.set_xlabel("Year")
+ax_occ.set_title("Wildfire Occurrences")
 st.pyplot(fig_occ)
 
 # Sensitivity plot
 st.subheader("Sensitivity: Fire Effect Duration vs. Avg Peak Discharge")
 durations = list(range(1, 31, 2))
-mean_discharge_vs_duration = []
-
-for duration in durations:
-    temp_Q_samples = np.zeros((num_simulations, design_lifespan_years))
-    for sim in range(num_simulations):
-        C_vals = np.copy(C_baseline_samples[sim])
-        for year in range(design_lifespan_years):
-            if wildfire_occurrences[sim, year] == 1:
-                end_effect = min(year + duration, design_lifespan_years)
-                C_vals[year:end_effect] = C_post_wildfire_samples[sim, year:end_effect]
-        temp_Q_samples[sim, :] = C_vals * rainfall_intensity_m_s * drainage_area_m2
-    avg_discharge = np.mean(temp_Q_samples, axis=1)
-    mean_discharge_vs_duration.append(np.mean(avg_discharge))
+
+# mean(Q) = (mean(C_base) + sum of (C_post - C_base) over fire-affected cells / cell count) * k,
+# so each duration only needs its window mask and one masked sum instead of a full re-simulation.
+# The baseline term is mean_bl, already computed above.
+C_delta = C_post_wildfire_samples - C_baseline_samples
+
+def compute_Q_mean(duration):
+    active = fire_effect_active(fires_to_date, duration)
+    # Accumulate in float64 so the 700k-cell sum keeps the float32 samples' precision
+    extra_C = C_delta.sum(where=active, dtype=np.float64) / C_delta.size
+    return mean_bl + extra_C * discharge_factor
+
+mean_discharge_vs_duration = [compute_Q_mean(duration) for duration in durations]
 
 fig_sens, ax_sens = plt.subplots()
 ax_sens.plot(durations, mean_discharge_vs_duration, marker='o', color='teal')
@@ -0,0 +1,84 @@
+import math
+import streamlit as st
+import numpy as np
+
+# --- Time of Concentration Methods ---
+# The power-law methods are evaluated as exp(log(c) + a*log(x) + b*log(y) + ...).
+# The *_log versions take natural logs of their inputs, so a simulation computes each log once.
+def power_law_tc(log_coeff, terms):
+    out = np.full_like(terms[0][1], log_coeff)
+    scratch = np.empty_like(out)
+    for exponent, log_x in terms:
+        np.multiply(log_x, exponent, out=scratch)
+        np.add(out, scratch, out=out)
+    return np.exp(out, out=out)
+
+def kirpich_tc_log(log_length, log_slope):
+    return power_law_tc(math.log(0.01947), [(0.77, log_length), (-0.385, log_slope)])
+
+def nrcs_sheetflow_tc_log(log_length, log_slope, log_n, p2):
+    return power_law_tc(0.8 * math.log(0.007) - 0.5 * math.log(p2),
+                        [(0.8, log_n), (0.8, log_length), (-0.4, log_slope)])
+
+def manning_tc_log(log_length, log_slope, log_n):
+    return power_law_tc(math.log(1.44), [(0.6, log_length), (0.6, log_n), (-0.3, log_slope)])
+
+def bransby_williams_tc_log(log_area, log_slope):
+    return power_law_tc(math.log(58.5) + 0.1 * math.log(1e6), [(0.1, log_area), (-0.2, log_slope)])
+
+def kerby_hathaway_tc_log(log_length, log_slope, log_n):
+    return power_law_tc(math.log(0.946), [(0.77, log_length), (-0.385, log_slope), (0.385, log_n)])
+
+def izzard_tc_log(log_length, log_slope, log_n, k=0.00025):
+    return power_law_tc(math.log(k), [(0.9, log_length), (-0.6, log_slope), (0.4, log_n)])
+
+# Physical-unit entry points (length m, slope m/m, area km²); they take the logs and
+# defer to the *_log versions above
+def kirpich_tc(length, slope):
+    return kirpich_tc_log(np.log(length), np.log(slope))
+
+def nrcs_sheetflow_tc(length, slope, n, p2):
+    return nrcs_sheetflow_tc_log(np.log(length), np.log(slope), np.log(n), p2)
+
+def manning_tc(length, slope, n):
+    return manning_tc_log(np.log(length), np.log(slope), np.log(n))
+
+def bransby_williams_tc(area, slope):
+    return bransby_williams_tc_log(np.log(area), np.log(slope))
+
+def airport_tc(area):
+    return 1.8 * ((area * 1e6) ** 0.5) / 1000 - 0.5
+
+def kerby_hathaway_tc(length, slope, n):
+    return kerby_hathaway_tc_log(np.log(length), np.log(slope), np.log(n))
+
+def izzard_tc(length, slope, n, k=0.00025):
+    return izzard_tc_log(np.log(length), np.log(slope), np.log(n), k)
+
+# --- Monte Carlo ---
+# Cached on the input ranges; catchment type only affects which methods are displayed
+@st.cache_data(max_entries=32)
+def monte_carlo_analysis(length_range, slope_range, roughness_range, area_range, iterations, p2, izzard_k):
+    # Draw every parameter for every iteration in one call, one contiguous row per parameter;
+    # the Tc methods are elementwise, so they take the rows directly
+    ranges = np.array([length_range, slope_range, roughness_range, area_range])
+    rng = np.random.default_rng()
+    L, S, n, A = rng.uniform(ranges[:, :1], ranges[:, 1:], size=(len(ranges), iterations))
+
+    logL, logS, logN, logA = np.log(L), np.log(S), np.log(n), np.log(A)
+
+    results = {
+        'Kirpich': kirpich_tc_log(logL, logS),
+        'NRCS (Sheet Flow)': nrcs_sheetflow_tc_log(logL, logS, logN, p2),
+        'Manning-KWA': manning_tc_log(logL, logS, logN),
+        'Bransby-Williams': bransby_williams_tc_log(logA, logS),
+        'Airport': airport_tc(A),
+        'Kerby-Hathaway': kerby_hathaway_tc_log(logL, logS, logN),
+        'Izzard': izzard_tc_log(logL, logS, logN, izzard_k)
+    }
+
+    return results
+
+def summary_stats(arr):
+    # The simulation already returns ndarrays, so reduce them directly (np.std is the stable two-pass form)
+    return arr.mean(), arr.std(), arr.min(), arr.max()